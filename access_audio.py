@@ -1,81 +1,315 @@
+import aiofiles
+import asyncio
+import hashlib
+import httpx
+import logging
+import mimetypes
+import orjson
 import os
 import requests
+import shelve
+import shutil
 import socket
+import tempfile
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
+from requests.adapters import HTTPAdapter, Retry
 import streamlit as st
 import uvicorn
 from typing import Optional
+from urllib.parse import quote
 
-# Initialize FastAPI app
-app = FastAPI(title="GitHub Audio Access API")
+logger = logging.getLogger(__name__)
+
+# Initialize FastAPI app; orjson serializes outgoing JSON in Rust
+app = FastAPI(title="GitHub Audio Access API", default_response_class=ORJSONResponse)
 
 # Configuration
-GITHUB_RAW_BASE_URL = "https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{file_path}"
-GITHUB_API_BASE_URL = "https://api.github.com/repos/{owner}/{repo}/contents/{path}?ref={branch}"
 AUDIO_CACHE_DIR = "audio_cache"
+AUDIO_CACHE_MAX_BYTES = 500 * 1024 * 1024  # LRU-evict cached audio beyond this
 SUPPORTED_FORMATS = ('.mp3', '.wav', '.ogg', '.flac', '.m4a')
+# Frozenset membership rejects non-audio names on a single hash probe;
+# only the short extension gets lowercased, never the whole filename
+_EXTS = frozenset(SUPPORTED_FORMATS)
 SERVER_START_TIMEOUT = 5  # seconds to wait for server to start
 
 # Create cache directory if it doesn't exist
 os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
 
+# Thread pool for fire-and-forget work from the Streamlit side (cache
+# warming) and a shared HTTP session with keep-alive connections
+_DL_POOL = ThreadPoolExecutor(max_workers=4)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.2)
+))
+
+# URL builders; f-strings format with direct bytecode ops, where
+# str.format re-parses the {name} specifiers on every call
+def _raw_url(owner: str, repo: str, branch: str, file_path: str) -> str:
+    return f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{file_path}"
+
+def _api_url(owner: str, repo: str, branch: str, path: str) -> str:
+    return f"https://api.github.com/repos/{owner}/{repo}/contents/{path}?ref={branch}"
+
+# Cache validators (ETag/Last-Modified) for cached files, keyed by local
+# path (dotted name so the LRU sweep over AUDIO_CACHE_DIR skips the
+# shelve files)
+_VALIDATOR_DB_PATH = os.path.join(AUDIO_CACHE_DIR, ".validators")
+_VALIDATOR_LOCK = threading.Lock()
+
+def _cache_path(owner: str, repo: str, branch: str, file_path: str) -> str:
+    """Content-addressed cache path for a repo file.
+
+    Keying on owner/repo/branch/path instead of the basename keeps files
+    with the same name from different repos from overwriting each other.
+    """
+    key = hashlib.sha1(f"{owner}/{repo}/{branch}/{file_path}".encode()).hexdigest()
+    ext = os.path.splitext(file_path)[1].lower()
+    return os.path.join(AUDIO_CACHE_DIR, key + ext)
+
+def _conditional_headers(local_path: str) -> dict:
+    """Request headers that let GitHub answer 304 for an unchanged file."""
+    if not os.path.exists(local_path):
+        return {}
+    with _VALIDATOR_LOCK:
+        with shelve.open(_VALIDATOR_DB_PATH) as db:
+            validators = db.get(local_path) or {}
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+def _store_validators(local_path: str, response_headers) -> None:
+    etag = response_headers.get('ETag')
+    last_modified = response_headers.get('Last-Modified')
+    if not (etag or last_modified):
+        return
+    with _VALIDATOR_LOCK:
+        with shelve.open(_VALIDATOR_DB_PATH) as db:
+            db[local_path] = {'etag': etag, 'last_modified': last_modified}
+
+# Per-cache-key download locks so concurrent requests for the same file
+# (the /warm fan-out racing /audio, or two /audio requests) download it
+# once instead of interleaving writes. The dicts stay small: one entry
+# per distinct cached file.
+_DL_LOCKS_GUARD = threading.Lock()
+_DL_LOCKS = {}
+_ASYNC_DL_LOCKS = {}
+
+def _download_lock(local_path: str) -> threading.Lock:
+    with _DL_LOCKS_GUARD:
+        return _DL_LOCKS.setdefault(local_path, threading.Lock())
+
+def _async_download_lock(local_path: str) -> asyncio.Lock:
+    # Only ever called from the single uvicorn event loop, so plain
+    # setdefault is race-free here
+    return _ASYNC_DL_LOCKS.setdefault(local_path, asyncio.Lock())
+
+def _evict_lru(max_bytes: int = AUDIO_CACHE_MAX_BYTES) -> None:
+    """Delete least-recently-used cached files until under the size budget."""
+    entries = []
+    total = 0
+    with os.scandir(AUDIO_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.startswith('.') or not entry.is_file():
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_atime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            continue
+
+# Trim any leftover over-budget cache from previous runs
+_evict_lru()
+
 class ServerManager:
     def __init__(self):
         self.port = None
         self.server_thread = None
         self.server_started = False
-
-    def find_available_port(self, start_port: int = 8000) -> int:
-        """Find an available port starting from start_port."""
-        for port in range(start_port, start_port + 50):
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind(('localhost', port))
-                    return port
-            except OSError:
-                continue
-        raise OSError(f"No available port found in range {start_port}-{start_port+49}")
+        self._server = None
+        self._sock = None
+        self._ready = threading.Event()
+        self._last_health_check = 0.0
+        self._last_health_result = False
 
     def start_server(self):
         """Start the FastAPI server in a separate thread."""
         if self.server_thread and self.server_thread.is_alive():
             return
 
-        self.port = self.find_available_port()
+        # Bind once to an OS-assigned port and hand the live socket to
+        # uvicorn. Probing ports and closing them before uvicorn re-binds
+        # left a window for another process to steal the port.
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self.port = self._sock.getsockname()[1]
         self.server_started = False
+        self._ready.clear()
 
-        def run_fastapi():
-            uvicorn.run(app, host="0.0.0.0", port=self.port)
-
-        self.server_thread = threading.Thread(target=run_fastapi, daemon=True)
+        # uvloop/httptools move the event loop and HTTP parsing into C,
+        # and skipping the access log drops a logging call per request
+        config = uvicorn.Config(
+            app,
+            fd=self._sock.fileno(),
+            loop='uvloop',
+            http='httptools',
+            access_log=False,
+            log_level='warning',
+            workers=1
+        )
+        self._server = uvicorn.Server(config)
+        self.server_thread = threading.Thread(target=self._server.run, daemon=True)
         self.server_thread.start()
 
-        # Wait for server to be ready
+        # Block until the app's startup hook signals ready — the event
+        # wakes this thread the moment the server is up, instead of the
+        # old sleep-and-poll rhythm
         start_time = time.time()
-        while not self.server_started and time.time() - start_time < SERVER_START_TIMEOUT:
-            try:
-                response = requests.get(f"http://localhost:{self.port}/health")
-                if response.status_code == 200:
-                    self.server_started = True
-            except:
-                time.sleep(0.1)
+        while time.time() - start_time < SERVER_START_TIMEOUT:
+            if not self._ready.wait(timeout=0.1):
+                if not self.server_thread.is_alive():
+                    # A crashed server would otherwise leave this loop (and
+                    # every caller's retry) spinning until the timeout
+                    logger.error("Server thread exited before startup completed")
+                    break
+                continue
+            # uvicorn runs lifespan startup before it opens the listener,
+            # so the event alone can fire while connections are still
+            # refused; server.started flips only once accept() is live
+            if self._server.started:
+                self.server_started = True
+                break
+            if not self.server_thread.is_alive():
+                logger.error("Server thread exited before startup completed")
+                break
+            time.sleep(0.005)
 
     def is_server_running(self) -> bool:
-        """Check if the server is running."""
+        """Check if the server is running.
+
+        The in-process uvicorn flag answers without any I/O for the common
+        case; the HTTP probe remains as a fallback since it validates the
+        app end-to-end, cached for a second because Streamlit reruns on
+        every widget interaction.
+        """
         if not self.port:
             return False
+        if self._server is not None and self._server.started \
+                and self.server_thread and self.server_thread.is_alive():
+            return True
+        now = time.monotonic()
+        if now - self._last_health_check < 1.0:
+            return self._last_health_result
         try:
             response = requests.get(f"http://localhost:{self.port}/health", timeout=1)
-            return response.status_code == 200
-        except:
-            return False
+            result = response.status_code == 200
+        except (requests.RequestException, OSError):
+            # Only connectivity failures mean "not running"; anything else
+            # is a real bug and should propagate, not be eaten (the old
+            # bare except also swallowed KeyboardInterrupt)
+            result = False
+        self._last_health_check = now
+        self._last_health_result = result
+        return result
 
 # Create server manager instance
 server_manager = ServerManager()
 
+class ZeroCopyFileResponse(FileResponse):
+    """FileResponse that hands the file descriptor to the ASGI server.
+
+    Servers advertising the http.response.zerocopysend extension push the
+    file with sendfile(2) — pagecache straight to the socket, no
+    userspace copy. A simple single-range request stays on the zero-copy
+    path too, which matters for browser audio scrubbing. Where the
+    extension is missing (plain uvicorn), this is exactly FileResponse.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        # HEAD goes through the stock response, which knows to omit the
+        # body; the zerocopy path below always ships one
+        if ('http.response.zerocopysend' not in scope.get('extensions', {})
+                or scope['method'] == 'HEAD'):
+            await super().__call__(scope, receive, send)
+            return
+
+        stat_result = os.stat(self.path)
+        self.set_stat_headers(stat_result)
+
+        status = self.status_code
+        offset, count = 0, stat_result.st_size
+        range_header = dict(scope.get('headers') or []).get(b'range', b'').decode('latin-1')
+        if range_header.startswith('bytes=') and ',' not in range_header:
+            start_s, _, end_s = range_header[6:].partition('-')
+            try:
+                if start_s:
+                    start = int(start_s)
+                    end = min(int(end_s), count - 1) if end_s else count - 1
+                else:
+                    # Suffix range: last N bytes
+                    start = max(0, count - int(end_s))
+                    end = count - 1
+            except ValueError:
+                # RFC 7233: an unparseable Range is ignored, not honored
+                start, end = None, None
+            if start is not None and 0 <= start <= end:
+                status = 206
+                self.headers['content-range'] = f"bytes {start}-{end}/{stat_result.st_size}"
+                self.headers['content-length'] = str(end - start + 1)
+                offset, count = start, end - start + 1
+
+        self.headers['accept-ranges'] = 'bytes'
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': self.raw_headers,
+        })
+        with open(self.path, 'rb') as f:
+            await send({
+                'type': 'http.response.zerocopysend',
+                'file': f.fileno(),
+                'offset': offset,
+                'count': count,
+                'more_body': False,
+            })
+
+@app.on_event("startup")
+async def create_http_client():
+    """Create the shared async HTTP client for the GitHub endpoints."""
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=httpx.Timeout(30.0, connect=3.0)
+    )
+
+@app.on_event("startup")
+async def signal_server_ready():
+    """Wake whoever is blocked in start_server the moment the app is up."""
+    server_manager._ready.set()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await app.state.http.aclose()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for server status."""
@@ -85,83 +319,201 @@ async def health_check():
 async def get_audio_file(owner: str, repo: str, branch: str, file_path: str):
     """FastAPI endpoint to access audio file from GitHub."""
     try:
-        local_path = download_audio_from_github(owner, repo, branch, file_path)
-        return FileResponse(local_path)
+        local_path = await download_audio_async(owner, repo, branch, file_path)
+        # The Cache-Control header lets the browser reuse the payload
+        # across playback and download of the same file
+        return ZeroCopyFileResponse(
+            local_path,
+            media_type=mimetypes.guess_type(file_path)[0] or 'audio/mpeg',
+            headers={'Cache-Control': 'public, max-age=86400'}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 @app.get("/list-audio/{owner}/{repo}/{branch}/{path:path}")
 async def list_audio_files(owner: str, repo: str, branch: str, path: str):
     """FastAPI endpoint to list audio files in a GitHub directory."""
-    api_url = GITHUB_API_BASE_URL.format(
-        owner=owner,
-        repo=repo,
-        path=path.lstrip('/'),
-        branch=branch
-    )
-    
+    api_url = _api_url(owner, repo, branch, path.lstrip('/'))
+
     try:
-        response = requests.get(api_url)
+        response = await app.state.http.get(api_url)
         response.raise_for_status()
-        contents = response.json()
-        
+        # orjson parses large directory listings 2-3x faster than stdlib json
+        contents = orjson.loads(response.content)
+
         if not isinstance(contents, list):
             return JSONResponse(status_code=400, content={"error": "Path is not a directory"})
         
         audio_files = [
-            item['name'] for item in contents 
-            if isinstance(item, dict) and 
-            item.get('type') == 'file' and 
-            item.get('name', '').lower().endswith(SUPPORTED_FORMATS)
+            item['name'] for item in contents
+            if isinstance(item, dict) and
+            item.get('type') == 'file' and
+            os.path.splitext(item.get('name', ''))[1].lower() in _EXTS
         ]
         
         return {"audio_files": audio_files}
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         return JSONResponse(status_code=404, content={"error": str(e)})
 
-def download_audio_from_github(owner: str, repo: str, branch: str, file_path: str) -> str:
+def download_audio_from_github(owner: str, repo: str, branch: str, file_path: str,
+                               session: Optional[requests.Session] = None) -> str:
     """Download audio file from GitHub and save to local cache."""
-    audio_url = GITHUB_RAW_BASE_URL.format(
-        owner=owner,
-        repo=repo,
-        branch=branch,
-        file_path=file_path.lstrip('/')
-    )
-    local_path = os.path.join(AUDIO_CACHE_DIR, os.path.basename(file_path))
-    
+    audio_url = _raw_url(owner, repo, branch, file_path.lstrip('/'))
+    local_path = _cache_path(owner, repo, branch, file_path)
+
     try:
-        response = requests.get(audio_url)
-        response.raise_for_status()
-        
-        with open(local_path, 'wb') as f:
-            f.write(response.content)
-            
+        with _download_lock(local_path):
+            # Revalidate an existing cached copy instead of re-downloading
+            # it (recomputed under the lock: a racing download may have
+            # just refreshed the file)
+            headers = _conditional_headers(local_path)
+
+            # Stream straight to disk instead of buffering the whole file
+            # in memory; audio files can run to tens of MB.
+            with (session or _SESSION).get(audio_url, stream=True, timeout=(3.05, 30),
+                                           headers=headers) as response:
+                if response.status_code == 304:
+                    os.utime(local_path)  # keep LRU ordering honest
+                    return local_path
+                response.raise_for_status()
+
+                # Write to a temp file and rename into place so readers
+                # never observe a half-written cache entry
+                fd, tmp_path = tempfile.mkstemp(dir=AUDIO_CACHE_DIR, prefix='.tmp-')
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        shutil.copyfileobj(response.raw, f, length=1 << 20)
+                    os.replace(tmp_path, local_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
+                _store_validators(local_path, response.headers)
+
+        _evict_lru()
         return local_path
     except requests.RequestException as e:
         raise HTTPException(status_code=404, detail=f"Audio file not found: {str(e)}")
 
+async def download_audio_async(owner: str, repo: str, branch: str, file_path: str) -> str:
+    """Async variant of download_audio_from_github for the FastAPI endpoints.
+
+    Blocking requests calls inside async handlers park the uvicorn event
+    loop for the whole GitHub round-trip; this streams over the shared
+    httpx.AsyncClient instead so concurrent requests interleave.
+    """
+    audio_url = _raw_url(owner, repo, branch, file_path.lstrip('/'))
+    local_path = _cache_path(owner, repo, branch, file_path)
+
+    try:
+        async with _async_download_lock(local_path):
+            # Recomputed under the lock: a racing download may have just
+            # refreshed the file
+            headers = _conditional_headers(local_path)
+
+            async with app.state.http.stream('GET', audio_url, headers=headers) as response:
+                if response.status_code == 304:
+                    os.utime(local_path)  # keep LRU ordering honest
+                    return local_path
+                response.raise_for_status()
+
+                # Write to a temp file and rename into place so readers
+                # never observe a half-written cache entry
+                fd, tmp_path = tempfile.mkstemp(dir=AUDIO_CACHE_DIR, prefix='.tmp-')
+                os.close(fd)
+                try:
+                    async with aiofiles.open(tmp_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes(1 << 20):
+                            await f.write(chunk)
+                    os.replace(tmp_path, local_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
+                _store_validators(local_path, response.headers)
+
+        _evict_lru()
+        return local_path
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=404, detail=f"Audio file not found: {str(e)}")
+
+async def _warm_one(owner: str, repo: str, branch: str, file_path: str,
+                    sem: asyncio.Semaphore) -> None:
+    async with sem:
+        await download_audio_async(owner, repo, branch, file_path)
+
+@app.get("/warm/{owner}/{repo}/{branch}/{path:path}")
+async def warm_audio_cache(owner: str, repo: str, branch: str, path: str):
+    """FastAPI endpoint to list a directory and pre-download its audio files.
+
+    One call fans out server-side over the shared async client, so the
+    Streamlit side pays a single localhost round-trip instead of one
+    request per file.
+    """
+    listing = await list_audio_files(owner, repo, branch, path)
+    if isinstance(listing, JSONResponse):
+        return listing
+    files = listing["audio_files"]
+
+    # Cap GitHub concurrency to stay clear of secondary rate limits
+    sem = asyncio.Semaphore(8)
+    results = await asyncio.gather(
+        *[
+            _warm_one(owner, repo, branch, f"{path}/{name}" if path else name, sem)
+            for name in files
+        ],
+        return_exceptions=True
+    )
+    warmed = sum(1 for r in results if not isinstance(r, Exception))
+    return {"audio_files": files, "warmed": warmed}
+
+@st.cache_data(ttl=300, max_entries=128, show_spinner=False)
+def _list_audio(list_url: str) -> list:
+    """List audio files via the FastAPI endpoint, memoized per repo URL."""
+    response = requests.get(list_url, timeout=10)
+    response.raise_for_status()
+    return response.json().get("audio_files", [])
+
+def _refresh_url_bases() -> None:
+    """Precompute quoted endpoint URLs for the current repo fields.
+
+    Rebuilding (and percent-encoding) these on every rerun is wasted work;
+    they only change when the repo form is submitted or the server port
+    moves.
+    """
+    base = f"http://localhost:{server_manager.port}"
+    repo_part = f"{quote(st.session_state.owner)}/" \
+                f"{quote(st.session_state.repo)}/" \
+                f"{quote(st.session_state.branch)}/"
+    st.session_state.base_list_url = f"{base}/list-audio/{repo_part}{quote(st.session_state.path)}"
+    st.session_state.base_warm_url = f"{base}/warm/{repo_part}{quote(st.session_state.path)}"
+    st.session_state.base_audio_url = f"{base}/audio/{repo_part}"
+    st.session_state.url_port = server_manager.port
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _fetch_audio_bytes(owner: str, repo: str, branch: str, file_path: str) -> bytes:
+    """Read audio bytes from the local cache, downloading on a cold miss."""
+    local_path = _cache_path(owner, repo, branch, file_path)
+    if not os.path.exists(local_path):
+        local_path = download_audio_from_github(owner, repo, branch, file_path)
+    with open(local_path, 'rb') as f:
+        return f.read()
+
 def main():
     """Main application function with persistent state."""
     st.title("GitHub Audio File Access")
     st.markdown("Access and play audio files directly from a GitHub repository")
     
-    # Initialize session state variables if they don't exist
+    # Initialize session state variables if they don't exist; the repo
+    # fields and selection live in widget keys, which Streamlit persists
+    # across reruns on its own
     if 'audio_files' not in st.session_state:
         st.session_state.audio_files = []
-    if 'selected_file' not in st.session_state:
-        st.session_state.selected_file = None
-    if 'repo_info' not in st.session_state:
-        st.session_state.repo_info = {
-            'owner': 'MEERAN2314',
-            'repo': 'Audio_files-',
-            'branch': 'main',
-            'path': ''
-        }
     
     # Start or restart server if needed
+    # start_server blocks on the startup event, so no settling sleep
     if not server_manager.is_server_running():
         server_manager.start_server()
-        time.sleep(1)  # Give server a moment to start
     
     if server_manager.port:
         st.info(f"Server running on port: {server_manager.port}")
@@ -169,29 +521,29 @@ def main():
         st.error("Server failed to start")
         return
     
-    # Repository information form
+    # Repository information form; form inputs only publish their keys on
+    # submit, and the submit itself already triggers a rerun
     with st.form("repo_info_form"):
         col1, col2, col3 = st.columns(3)
         with col1:
-            owner = st.text_input("GitHub Owner/Username", st.session_state.repo_info['owner'])
+            st.text_input("GitHub Owner/Username", "MEERAN2314", key='owner')
         with col2:
-            repo = st.text_input("Repository Name", st.session_state.repo_info['repo'])
+            st.text_input("Repository Name", "Audio_files-", key='repo')
         with col3:
-            branch = st.text_input("Branch", st.session_state.repo_info['branch'])
-        
-        path = st.text_input("Path to audio files (leave empty for root)", st.session_state.repo_info['path'])
-        
+            st.text_input("Branch", "main", key='branch')
+
+        st.text_input("Path to audio files (leave empty for root)", "", key='path')
+
         if st.form_submit_button("Update Repository Info"):
-            st.session_state.repo_info = {
-                'owner': owner,
-                'repo': repo,
-                'branch': branch,
-                'path': path
-            }
             st.session_state.audio_files = []  # Clear previous files
-            st.session_state.selected_file = None  # Clear selection
-            st.experimental_rerun()
-    
+            st.session_state.pop('selected_file', None)  # Clear selection
+            _refresh_url_bases()
+
+    # Also rebuild on the first run and whenever the server port moved
+    if st.session_state.get('url_port') != server_manager.port:
+        _refresh_url_bases()
+
+
     # List audio files button
     if st.button("List Audio Files"):
         try:
@@ -199,70 +551,69 @@ def main():
                 # Ensure server is running
                 if not server_manager.is_server_running():
                     server_manager.start_server()
-                    time.sleep(1)
-                
-                # Properly encode the path
-                encoded_path = requests.utils.quote(st.session_state.repo_info['path'])
-                list_url = f"http://localhost:{server_manager.port}/list-audio/" \
-                          f"{st.session_state.repo_info['owner']}/" \
-                          f"{st.session_state.repo_info['repo']}/" \
-                          f"{st.session_state.repo_info['branch']}/" \
-                          f"{encoded_path}"
                 
                 try:
-                    response = requests.get(list_url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        st.session_state.audio_files = response.json().get("audio_files", [])
-                        st.session_state.selected_file = None  # Reset selection when listing new files
-                        st.success(f"Found {len(st.session_state.audio_files)} audio files")
-                    else:
-                        error_msg = response.json().get("error", "Unknown error")
-                        st.error(f"Error fetching files: {error_msg}")
+                    st.session_state.audio_files = _list_audio(st.session_state.base_list_url)
+                    st.session_state.pop('selected_file', None)  # Reset selection when listing new files
+                    st.success(f"Found {len(st.session_state.audio_files)} audio files")
+
+                    # Warm the cache in the background so playback is
+                    # instant by the time the user picks a file; the server
+                    # fans the downloads out, so this is one localhost call
+                    if st.session_state.audio_files:
+                        _DL_POOL.submit(requests.get, st.session_state.base_warm_url, timeout=300)
+                except requests.exceptions.HTTPError as e:
+                    st.error(f"Error fetching files: {str(e)}")
                 except requests.exceptions.RequestException as e:
                     st.error(f"Connection error: {str(e)}. Trying to restart server...")
                     server_manager.start_server()
-                    time.sleep(1)
-                    st.experimental_rerun()
+                    st.rerun()
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
     
-    # Display audio files if available
-    if st.session_state.audio_files:
-        selected_file = st.selectbox(
-            "Select an audio file",
-            st.session_state.audio_files,
-            index=st.session_state.audio_files.index(st.session_state.selected_file) 
-            if st.session_state.selected_file in st.session_state.audio_files 
-            else 0
-        )
-        
-        if selected_file != st.session_state.selected_file:
-            st.session_state.selected_file = selected_file
-            st.experimental_rerun()
-        
-        if st.session_state.selected_file:
-            # Properly encode the file path
-            file_path = f"{st.session_state.repo_info['path']}/{st.session_state.selected_file}" \
-                      if st.session_state.repo_info['path'] else st.session_state.selected_file
-            encoded_file_path = requests.utils.quote(file_path)
-            audio_url = f"http://localhost:{server_manager.port}/audio/" \
-                       f"{st.session_state.repo_info['owner']}/" \
-                       f"{st.session_state.repo_info['repo']}/" \
-                       f"{st.session_state.repo_info['branch']}/" \
-                       f"{encoded_file_path}"
-            
-            st.audio(audio_url)
-            
-            try:
-                st.download_button(
-                    label="Download Audio",
-                    data=requests.get(audio_url).content,
-                    file_name=st.session_state.selected_file,
-                    mime="audio/mpeg"
-                )
-            except Exception as e:
-                st.error(f"Download failed: {str(e)}")
+    # Selection changes rerun only the player fragment, not the whole page
+    _audio_player_fragment()
+
+@st.fragment
+def _audio_player_fragment():
+    """Selectbox + player + download button for the listed audio files.
+
+    As a fragment, selection changes re-execute only this block; the
+    server probe, repo form, and list button above it stay untouched.
+    """
+    if not st.session_state.audio_files:
+        return
+
+    st.selectbox(
+        "Select an audio file",
+        st.session_state.audio_files,
+        key='selected_file'
+    )
+
+    if st.session_state.selected_file:
+        # Only the selected file still needs encoding per interaction
+        file_path = f"{st.session_state.path}/{st.session_state.selected_file}" \
+                  if st.session_state.path else st.session_state.selected_file
+        audio_url = st.session_state.base_audio_url + quote(file_path)
+
+        st.audio(audio_url)
+
+        try:
+            data = _fetch_audio_bytes(
+                st.session_state.owner,
+                st.session_state.repo,
+                st.session_state.branch,
+                file_path
+            )
+
+            st.download_button(
+                label="Download Audio",
+                data=data,
+                file_name=st.session_state.selected_file,
+                mime=mimetypes.guess_type(st.session_state.selected_file)[0] or "audio/mpeg"
+            )
+        except Exception as e:
+            st.error(f"Download failed: {str(e)}")
 
 if __name__ == "__main__":
     # Initialize and start server